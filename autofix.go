@@ -22,6 +22,10 @@ var KnownExtensions = []string{
 	"wmv", "flv", "mov", "mp4", "mpg",
 }
 
+// reStaticNum matches the (n) numbering we add to resolve name clashes
+// compiled once as it is shared by every AutoFix
+var reStaticNum = regexp.MustCompile(`(.*)(\(\d+\))$`)
+
 // AutoFix is the structure for autofixing the files
 type AutoFix struct {
 	DeleteFiles  bool
@@ -29,8 +33,8 @@ type AutoFix struct {
 	ReStaticNum  *regexp.Regexp
 	ReDomainList []*regexp.Regexp
 	// For all the file we encounter, keep their hash
-	// FIXME elsewhere we use size && hash as the key to uniqueness
-	FileHash       map[string]FileStruct
+	// keyed on size && hash as elsewhere, so only true clashes collide
+	FileHash       map[FileKey]FileStruct
 	FhLock         *sync.RWMutex
 	SilenceLogging bool
 }
@@ -41,7 +45,7 @@ func (af *AutoFix) initFileHash() {
 		af.FhLock = new(sync.RWMutex)
 	}
 	if af.FileHash == nil {
-		af.FileHash = make(map[string]FileStruct)
+		af.FileHash = make(map[FileKey]FileStruct)
 	}
 }
 
@@ -65,7 +69,7 @@ func NewAutoFixFile(fn string) *AutoFix {
 }
 
 func (af *AutoFix) afInit(dl []string) {
-	af.ReStaticNum = regexp.MustCompile(`(.*)(\(\d+\))$`)
+	af.ReStaticNum = reStaticNum
 	af.ReDomainList = make([]*regexp.Regexp, len(dl))
 	for i, rs := range dl {
 		af.ReDomainList[i] = regexp.MustCompile(rs)
@@ -314,7 +318,6 @@ func ResolveFnClash(directory, fn string, extension, orig string) string {
 }
 
 // WkFun Walk function across the supplied directories
-// FIXME add testcases for this function
 func (af *AutoFix) WkFun(dm DirectoryMap, directory, file string, d fs.DirEntry) error {
 	fs, ok := dm.Get(file)
 	if !ok {
@@ -330,9 +333,9 @@ func (af *AutoFix) WkFun(dm DirectoryMap, directory, file string, d fs.DirEntry)
 	fs, modified := af.CheckRename(fs)
 
 	// Now look to see if we have seen this file's hash before
-	cSum := fs.Checksum
+	key := fs.Key()
 	af.FhLock.RLock()
-	oldFs, ok := af.FileHash[cSum]
+	oldFs, ok := af.FileHash[key]
 	af.FhLock.RUnlock()
 	if ok {
 		var mod bool
@@ -343,7 +346,7 @@ func (af *AutoFix) WkFun(dm DirectoryMap, directory, file string, d fs.DirEntry)
 	}
 
 	af.FhLock.Lock()
-	af.FileHash[cSum] = fs
+	af.FileHash[key] = fs
 	af.FhLock.Unlock()
 	if modified {
 		dm.Add(fs)
@@ -1,7 +1,10 @@
 package medorg
 
 import (
+	"io/ioutil"
 	"log"
+	"os"
+	"path/filepath"
 	"testing"
 )
 
@@ -75,3 +78,66 @@ func TestRename1(t *testing.T) {
 		}
 	}
 }
+
+// wkFunFiles writes each content to its own file in a fresh directory
+// and returns the records for them, all claiming the same checksum
+func wkFunFiles(t *testing.T, contents ...string) (string, DirectoryMap, []string) {
+	t.Helper()
+	directory, err := ioutil.TempDir("", "tstDir")
+	if err != nil {
+		t.Fatal(err)
+	}
+	t.Cleanup(func() { os.RemoveAll(directory) })
+	dm := *NewDirectoryMap()
+	names := make([]string, len(contents))
+	for i, content := range contents {
+		names[i] = "file" + string(rune('a'+i)) + ".txt"
+		err := ioutil.WriteFile(filepath.Join(directory, names[i]), []byte(content), 0600)
+		if err != nil {
+			t.Fatal(err)
+		}
+		fs, err := NewFileStruct(directory, names[i])
+		if err != nil {
+			t.Fatal(err)
+		}
+		fs.Checksum = "clash"
+		dm.Add(fs)
+	}
+	return directory, dm, names
+}
+
+func runWkFun(t *testing.T, directory string, dm DirectoryMap, names []string) {
+	t.Helper()
+	af := NewAutoFix(nil)
+	af.DeleteFiles = true
+	af.SilenceLogging = true
+	for _, fn := range names {
+		err := af.WkFun(dm, directory, fn, nil)
+		if err != nil {
+			t.Fatal(err)
+		}
+	}
+}
+
+func TestWkFunSameChecksumDifferentSize(t *testing.T) {
+	directory, dm, names := wkFunFiles(t, "short", "rather longer")
+	runWkFun(t, directory, dm, names)
+	for _, fn := range names {
+		if !FileExist(directory, fn) {
+			t.Error("Resolved as a duplicate despite differing size:", fn)
+		}
+	}
+}
+
+func TestWkFunResolvesDuplicate(t *testing.T) {
+	// The middle file shares the checksum but not the size,
+	// it must not hide the first from the third
+	directory, dm, names := wkFunFiles(t, "duplicate", "not a duplicate", "duplicate")
+	runWkFun(t, directory, dm, names)
+	if !FileExist(directory, names[1]) {
+		t.Error("Deleted the file of a different size:", names[1])
+	}
+	if FileExist(directory, names[0]) == FileExist(directory, names[2]) {
+		t.Error("Expected exactly one of the duplicates to be deleted")
+	}
+}
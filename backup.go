@@ -14,6 +14,9 @@ import (
 // MaxBackups ifs the maximum number of drives we will backup a file to
 var MaxBackups = 4
 
+// BackupCalcCnt is the number of checksums a backup scan will calculate at once
+var BackupCalcCnt = 2
+
 // ErrMissingEntry You are copying a file that there is no directory entry for. Probably need to rerun a visit on the directory
 var ErrMissingEntry = errors.New("attempting to copy a file there seems to be no directory entry for")
 
@@ -31,36 +34,37 @@ var ErrIOError = syscall.Errno(5) // I don't like this, but don't know a better
 // Export of no space left on device from syscall
 var ErrNoSpace = syscall.Errno(28)
 
-type backupKey struct {
-	size     int64
-	checksum string
+// FileKey identifies a file's contents, so only true duplicates share one
+type FileKey struct {
+	Size     int64
+	Checksum string
 }
 type backupDupeMap struct {
-	sync.Mutex
-	dupeMap map[backupKey]Fpath
+	sync.RWMutex
+	dupeMap map[FileKey]Fpath
 }
 
 // Add an entry to the map
 func (bdm *backupDupeMap) Add(fs FileStruct) {
-	key := backupKey{fs.Size, fs.Checksum}
+	key := fs.Key()
 	bdm.Lock()
 	if bdm.dupeMap == nil {
-		bdm.dupeMap = make(map[backupKey]Fpath)
+		bdm.dupeMap = make(map[FileKey]Fpath)
 	}
-	bdm.dupeMap[key] = Fpath(fs.Path())
+	bdm.dupeMap[key] = fs.Path()
 	bdm.Unlock()
 }
 func (bdm *backupDupeMap) Len() int {
 	if bdm.dupeMap == nil {
 		return 0
 	}
-	bdm.Lock()
-	defer bdm.Unlock()
+	bdm.RLock()
+	defer bdm.RUnlock()
 	return len(bdm.dupeMap)
 }
 
 // Remove an entry from the dumap
-func (bdm *backupDupeMap) Remove(key backupKey) {
+func (bdm *backupDupeMap) Remove(key FileKey) {
 	if bdm.dupeMap == nil {
 		return
 	}
@@ -70,12 +74,13 @@ func (bdm *backupDupeMap) Remove(key backupKey) {
 }
 
 // Get an item from the map
-func (bdm *backupDupeMap) Get(key backupKey) (Fpath, bool) {
+func (bdm *backupDupeMap) Get(key FileKey) (Fpath, bool) {
 	if bdm.dupeMap == nil {
 		return "", false
 	}
-	bdm.Lock()
-	defer bdm.Unlock()
+	// Every source file looks up the destination map, so let them share it
+	bdm.RLock()
+	defer bdm.RUnlock()
 	v, ok := bdm.dupeMap[key]
 	return v, ok
 }
@@ -100,13 +105,19 @@ type backScanner struct {
 
 func (dm DirectoryMap) updateAndGo(dir, fn string) (fs FileStruct, err error) {
 	// Update the checksum, creating the FS if needed
-	err = dm.UpdateChecksum(dir, fn, false)
+	// and keep what was stored rather than looking it up again
+	ok := false
+	fc := func(f *FileStruct) error {
+		err := f.UpdateChecksum(false)
+		fs, ok = *f, true
+		return err
+	}
+	err = dm.RunFsFc(dir, fn, fc)
 	if err != nil {
 		return
 	}
 
 	// Add everything we find to the destination map
-	fs, ok := dm.Get(fn)
 	if Debug && !ok {
 		// If the FS does not exist, then UpdateChecksum is faulty
 		return fs, fmt.Errorf("dst %w: %s/%s", errMissingSrcEntry, dir, fn)
@@ -117,8 +128,7 @@ func (dm DirectoryMap) updateAndGo(dir, fn string) (fs FileStruct, err error) {
 // scanBackupDirectories will mark srcDir's ArchiveAt
 // tag, with any files that are already found in the destination
 func (bs backScanner) scanBackupDirectories(destDir, srcDir, volumeName string) error {
-	calcCnt := 2
-	tokenBuffer := makeTokenChan(calcCnt)
+	tokenBuffer := makeTokenChan(BackupCalcCnt)
 	defer close(tokenBuffer)
 
 	var backupDestination backupDupeMap
@@ -252,12 +262,52 @@ func extractCopyFiles(targetDir, volumeName string) (fpathListList, error) {
 
 type FileCopier func(src, dst Fpath) error
 
+// dmFlusher holds the DirectoryMap of the directory currently being updated
+// extractCopyFiles buckets files by their ArchivedAt count and keeps walk order
+// within each bucket, so a run of files from one directory shares a load and a
+// persist, but a directory is still reloaded once for every bucket it appears in
+// The cost is that copies made since the last switch of directory are not yet
+// recorded, so if the process dies they are unrecorded and get copied again next run
+type dmFlusher struct {
+	dir string
+	dm  DirectoryMap
+}
+
+// get the dm for dir, persisting the one held if that was for another directory
+func (df *dmFlusher) get(dir string) (DirectoryMap, error) {
+	if df.dir == dir {
+		return df.dm, nil
+	}
+	err := df.flush()
+	if err != nil {
+		return df.dm, err
+	}
+	dm, err := DirectoryMapFromDir(dir)
+	if err != nil {
+		return dm, err
+	}
+	df.dir, df.dm = dir, dm
+	return dm, nil
+}
+
+// flush persists the dm held, if any
+func (df *dmFlusher) flush() error {
+	if df.dir == "" {
+		return nil
+	}
+	dir := df.dir
+	df.dir = ""
+	return df.dm.Persist(dir)
+}
+
 func doACopy(
 	srcDir, // The source of the backup as specified on the command line
 	destDir, // The destination directory as specified...
 	backupLabelName string, // the tag w should add to the sorce
 	file Fpath, // The full path of the file
-	fc FileCopier) error {
+	fc FileCopier,
+	srcDms, dstDms *dmFlusher, // Where to record the copy
+) error {
 	if fc == nil {
 		fc = CopyFile
 	}
@@ -269,47 +319,47 @@ func doACopy(
 	if err != nil {
 		return err
 	}
+	dstFile := NewFpath(destDir, rel)
+
+	// Make sure we can record the copy before spending time on it
+	basename := filepath.Base(string(file))
+	sd := filepath.Dir(string(file))
+	dmSrc, err := srcDms.get(sd)
+	if err != nil {
+		return err
+	}
+	src, ok := dmSrc.Get(basename)
+	if !ok {
+		return fmt.Errorf("%w: %s, \"%s\" \"%s\"", ErrMissingEntry, file, sd, basename)
+	}
 
 	// Actually copy the file
-	err = fc(file, NewFpath(destDir, rel))
+	err = fc(file, dstFile)
 	if errors.Is(err, ErrDummyCopy) {
 		return nil
 	}
 	if errors.Is(err, ErrNoSpace) {
-		_ = rmFilename(NewFpath(destDir, rel))
+		_ = rmFilename(dstFile)
 		return ErrNoSpace
 	}
-	// Update the srcDir .md5 file with the fact we've backed this up now
-	basename := filepath.Base(string(file))
-	sd := filepath.Dir(string(file))
 	if err != nil {
 		return err
 	}
-	dmSrc, err := DirectoryMapFromDir(sd)
+	fs, err := os.Stat(string(dstFile))
 	if err != nil {
 		return err
 	}
-	src, ok := dmSrc.Get(basename)
-	if !ok {
-		return fmt.Errorf("%w: %s, \"%s\" \"%s\"", ErrMissingEntry, file, sd, basename)
-	}
+	dd := filepath.Dir(string(dstFile))
+	dst := src.cloneForDest(dd, fs.ModTime().Unix())
+	// Update the srcDir .md5 file with the fact we've backed this up now
 	_ = src.AddTag(backupLabelName)
 	dmSrc.Add(src)
-	dmSrc.Persist(srcDir)
-	_ = src.RemoveTag(backupLabelName)
 	// Update the destDir with the checksum from the srcDir
-	dmDst, err := DirectoryMapFromDir(destDir)
+	dmDst, err := dstDms.get(dd)
 	if err != nil {
 		return err
 	}
-	fs, err := os.Stat(filepath.Join(destDir, rel))
-	if err != nil {
-		return err
-	}
-	src.directory = destDir
-	src.Mtime = fs.ModTime().Unix()
-	dmDst.Add(src)
-	dmDst.Persist(destDir)
+	dmDst.Add(dst)
 	return nil
 }
 
@@ -340,24 +390,36 @@ func BackupRunner(xc *XMLCfg, fc FileCopier, srcDir, destDir string, orphanFunc
 	log.Println("Copy files extracted")
 	// FIXME Now run this through Prioritize
 	log.Println("Now starting Copy")
+	var srcDms, dstDms dmFlusher
+	flush := func() error {
+		srcErr := srcDms.flush()
+		dstErr := dstDms.flush()
+		if srcErr != nil {
+			return srcErr
+		}
+		return dstErr
+	}
 	// Now do the copy, updating srcDir's labels as we go
 	for _, copyFiles := range copyFilesArray {
 		for _, file := range copyFiles {
-			err := doACopy(srcDir, destDir, backupLabelName, file, fc)
+			err := doACopy(srcDir, destDir, backupLabelName, file, fc, &srcDms, &dstDms)
 			if errors.Is(err, ErrNoSpace) {
 				// FIXME in the ideal world, we'd look at how much space there is left on the volume
 				// and look for a file with a size smaller than that
 				// and copy that.
 				// For now, that optimization is not too bad.
 				log.Println("Destination full")
-				return nil
+				return flush()
 			}
 			if err != nil {
+				// Still record the copies that did succeed
+				if flushErr := flush(); flushErr != nil {
+					log.Println("Failed to persist after copy error:", flushErr)
+				}
 				return fmt.Errorf("copy failed, %w::%s, %s, %s, %s", err, srcDir, destDir, backupLabelName, file)
 			}
 		}
 	}
 	log.Println("Finished Copy")
-
-	return nil
+	return flush()
 }
@@ -10,7 +10,9 @@ import (
 	"os"
 	"path/filepath"
 	"sync"
+	"sync/atomic"
 	"testing"
+	"time"
 )
 
 var errMissingTestFile = errors.New("missing file")
@@ -28,11 +30,8 @@ func createTestBackupDirectories(numberOfFiles, numberOfDuplicates int) ([]strin
 		directoriesCreated[i] = dir
 	}
 
-	filenames := make([]string, numberOfFiles)
 	// Make a bunch of files in the src directory
-	for i := 0; i < numberOfFiles; i++ {
-		filenames[i] = makeFile(directoriesCreated[0])
-	}
+	filenames := makeFiles(directoriesCreated[0], numberOfFiles)
 	randomSrc := rand.Perm(numberOfFiles)
 	for i := 0; i < numberOfDuplicates; i++ {
 		selectedFilename := filenames[randomSrc[i]]
@@ -75,6 +74,41 @@ func recalcTestDirectory(dir string) error {
 	return nil
 }
 
+// setupBackupTest creates the backup directories and removes them when t completes
+func setupBackupTest(t *testing.T, numberOfFiles, numberOfDuplicates int) []string {
+	t.Helper()
+	dirs, err := createTestBackupDirectories(numberOfFiles, numberOfDuplicates)
+	t.Cleanup(func() {
+		for i := range dirs {
+			os.RemoveAll(dirs[i])
+		}
+	})
+	if err != nil {
+		t.Fatal("Failed to create test Directories", err)
+	}
+	return dirs
+}
+
+// recalcTestDirectories recalcs independent directories at the same time
+func recalcTestDirectories(dirs ...string) error {
+	errs := make([]error, len(dirs))
+	var wg sync.WaitGroup
+	for i, dir := range dirs {
+		wg.Add(1)
+		go func(i int, dir string) {
+			defer wg.Done()
+			errs[i] = recalcTestDirectory(dir)
+		}(i, dir)
+	}
+	wg.Wait()
+	for _, err := range errs {
+		if err != nil {
+			return err
+		}
+	}
+	return nil
+}
+
 func (bdm *backupDupeMap) aFile(dm DirectoryMap, dir, fn string, d fs.DirEntry) error {
 	if fn == Md5FileName {
 		return nil
@@ -92,20 +126,12 @@ func (bdm *backupDupeMap) aFile(dm DirectoryMap, dir, fn string, d fs.DirEntry)
 
 // Test whether we can detect duplicates within the
 func TestDuplicateDetect(t *testing.T) {
+	t.Parallel()
 	numberOfFiles := 20
 	numberOfDuplicates := 10
-	dirs, err := createTestBackupDirectories(numberOfFiles, numberOfDuplicates)
-	if err != nil {
-		t.Error("Failed to create test Directories", err)
-	}
-	defer func() {
-		for i := range dirs {
-			os.RemoveAll(dirs[i])
-		}
-	}()
+	dirs := setupBackupTest(t, numberOfFiles, numberOfDuplicates)
 	t.Log("Created Test Directories:", dirs)
-	_ = recalcTestDirectory(dirs[0])
-	_ = recalcTestDirectory(dirs[1])
+	_ = recalcTestDirectories(dirs[0], dirs[1])
 	var srcTm backupDupeMap
 	var dstTm backupDupeMap
 
@@ -134,14 +160,11 @@ func TestDuplicateDetect(t *testing.T) {
 	for err := range NewDirTracker(destDir, makerFuncDest) {
 		t.Error("Error received on closing:", err)
 	}
-	var lk sync.Mutex
-	expectedDuplicates := numberOfDuplicates
+	expectedDuplicates := int32(numberOfDuplicates)
 	bs := backScanner{
 		lookupFunc: func(path Fpath, ok bool) error {
 			if ok {
-				lk.Lock()
-				expectedDuplicates--
-				lk.Unlock()
+				atomic.AddInt32(&expectedDuplicates, -1)
 				t.Log(path, "is a duplicate")
 			}
 			return nil
@@ -154,30 +177,21 @@ func TestDuplicateDetect(t *testing.T) {
 }
 
 func TestDuplicateArchivedAtPopulation(t *testing.T) {
+	t.Parallel()
 	// As per TestDuplicateDetect, but have they had the
 	// ArchivedAt tag populated appropriately
-	dirs, err := createTestBackupDirectories(20, 10)
-	if err != nil {
-		t.Error("Failed to create test Directories", err)
-	}
-	defer func() {
-		for i := range dirs {
-			os.RemoveAll(dirs[i])
-		}
-	}()
-	_ = recalcTestDirectory(dirs[0])
-	_ = recalcTestDirectory(dirs[1])
+	dirs := setupBackupTest(t, 20, 10)
+	_ = recalcTestDirectories(dirs[0], dirs[1])
 
 	backupLabelName := "tstBackup"
 	t.Log("Created Test Directories:", dirs)
 	var bs backScanner
-	err = bs.scanBackupDirectories(dirs[1], dirs[0], backupLabelName)
+	err := bs.scanBackupDirectories(dirs[1], dirs[0], backupLabelName)
 	if err != nil {
 		t.Error(err)
 	}
 
-	expectedDuplicates := 10
-	var lk sync.Mutex
+	expectedDuplicates := int32(10)
 	archiveWalkFunc := func(dm DirectoryMap, dir, fn string, d fs.DirEntry) error {
 		if fn == Md5FileName {
 			return nil
@@ -187,9 +201,7 @@ func TestDuplicateArchivedAtPopulation(t *testing.T) {
 			return fmt.Errorf("%w:%s", errMissingTestFile, fn)
 		}
 		if fs.HasTag(backupLabelName) {
-			lk.Lock()
-			expectedDuplicates--
-			lk.Unlock()
+			atomic.AddInt32(&expectedDuplicates, -1)
 		}
 		return nil
 	}
@@ -214,6 +226,7 @@ func TestDuplicateArchivedAtPopulation(t *testing.T) {
 // FIXME add a test where the source already contains references to stuff in the destination
 
 func TestBackupExtract(t *testing.T) {
+	t.Parallel()
 	// Following on from TestDuplicateArchivedAtPopulation
 	// We have correctly detected the duplicates and populated the
 	// tags with this information.
@@ -221,17 +234,8 @@ func TestBackupExtract(t *testing.T) {
 	// we select the correct files to back up.
 	srcFiles := 20
 	numberBackedUp := 10
-	dirs, err := createTestBackupDirectories(srcFiles, numberBackedUp)
-	if err != nil {
-		t.Error("Failed to create test Directories", err)
-	}
-	defer func() {
-		for i := range dirs {
-			os.RemoveAll(dirs[i])
-		}
-	}()
-	_ = recalcTestDirectory(dirs[0])
-	_ = recalcTestDirectory(dirs[1])
+	dirs := setupBackupTest(t, srcFiles, numberBackedUp)
+	_ = recalcTestDirectories(dirs[0], dirs[1])
 	backupLabelName := "tstBackup0"
 	altBackupLabelName := "tstBackup1"
 	t.Log("Created Test Directories:", dirs)
@@ -335,18 +339,9 @@ func TestBackupMain(t *testing.T) {
 	// we select the correct files to back up.
 	srcFiles := 20
 	numberBackedUp := 11
-	dirs, err := createTestBackupDirectories(srcFiles, numberBackedUp)
-	if err != nil {
-		t.Error("Failed to create test Directories", err)
-	}
-	defer func() {
-		for i := range dirs {
-			os.RemoveAll(dirs[i])
-		}
-	}()
+	dirs := setupBackupTest(t, srcFiles, numberBackedUp)
 
-	_ = recalcTestDirectory(dirs[0])
-	_ = recalcTestDirectory(dirs[1])
+	_ = recalcTestDirectories(dirs[0], dirs[1])
 	callCount := 0
 
 	// FIXME Provide a proper dummy object here for testing
@@ -357,13 +352,106 @@ func TestBackupMain(t *testing.T) {
 		callCount++
 		return nil
 	}
-	err = BackupRunner(&xc, fc, dirs[0], dirs[1], nil)
+	err := BackupRunner(&xc, fc, dirs[0], dirs[1], nil)
 	if err != nil {
 		t.Error(err)
 	}
 	if callCount != (srcFiles - numberBackedUp) {
 		t.Error("Incorrect call count:", callCount, srcFiles-numberBackedUp)
 	}
+	// Every copy should have been recorded against the source
+	label, err := xc.getVolumeLabel(dirs[1])
+	if err != nil {
+		t.Error(err)
+	}
+	copyFilesArray, err := extractCopyFiles(dirs[0], label)
+	if err != nil {
+		t.Error(err)
+	}
+	for _, copyFiles := range copyFilesArray {
+		if len(copyFiles) > 0 {
+			t.Error("Files left to copy after backup:", copyFiles)
+		}
+	}
+}
+
+// Copies from a source subdirectory must be recorded against the
+// matching destination subdirectory, not the backup root
+func TestBackupSubdirectoryRecords(t *testing.T) {
+	t.Parallel()
+	dirs := setupBackupTest(t, 2, 0)
+	srcSub := filepath.Join(dirs[0], "sub")
+	dstSub := filepath.Join(dirs[1], "sub")
+	err := os.Mkdir(srcSub, 0755)
+	if err != nil {
+		t.Fatal(err)
+	}
+	// Age the sources so the copies get a different mtime
+	old := time.Now().Add(-time.Hour)
+	for _, fn := range makeFiles(srcSub, 3) {
+		err := os.Chtimes(fn, old, old)
+		if err != nil {
+			t.Fatal(err)
+		}
+	}
+	err = recalcTestDirectories(dirs[0], dirs[1])
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	var xc XMLCfg
+	fc := func(src, dst Fpath) error {
+		err := createDestDirectoryAsNeeded(string(dst))
+		if err != nil {
+			return err
+		}
+		return copyFileContents(string(src), string(dst))
+	}
+	err = BackupRunner(&xc, fc, dirs[0], dirs[1], nil)
+	if err != nil {
+		t.Fatal(err)
+	}
+	label, err := xc.getVolumeLabel(dirs[1])
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	srcDm, err := DirectoryMapFromDir(srcSub)
+	if err != nil {
+		t.Fatal(err)
+	}
+	dstDm, err := DirectoryMapFromDir(dstSub)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if dstDm.Len() != srcDm.Len() {
+		t.Error("Expected", srcDm.Len(), "records in", dstSub, "got", dstDm.Len())
+	}
+	err = srcDm.rangeMap(func(fn string, src FileStruct) error {
+		if !src.HasTag(label) {
+			t.Error("Source not labelled:", fn)
+		}
+		dst, ok := dstDm.Get(fn)
+		if !ok {
+			t.Error("No destination record for:", fn)
+			return nil
+		}
+		if dst.Checksum != src.Checksum {
+			t.Error("Checksum not carried across for:", fn)
+		}
+		info, err := os.Stat(filepath.Join(dstSub, fn))
+		if err != nil {
+			t.Error(err)
+			return nil
+		}
+		if dst.Mtime != info.ModTime().Unix() || dst.Mtime == src.Mtime {
+			t.Error("Destination record has the wrong mtime for:", fn, dst.Mtime, info.ModTime().Unix())
+		}
+		return nil
+	})
+	if err != nil {
+		t.Error(err)
+	}
 }
 
 // Our source directory has 2 files that are the same, just a different name
@@ -371,17 +459,10 @@ func TestBackupMain(t *testing.T) {
 // as on restore we'll not care about the name
 // so test that we only copy a single one of them
 func TestBackupSrcHasDuplicateFiles(t *testing.T) {
+	t.Parallel()
 	numberOfFiles := 2
 	numberOfDuplicates := 2
-	dirs, err := createTestBackupDirectories(numberOfFiles, numberOfDuplicates)
-	if err != nil {
-		t.Error("Failed to create test Directories", err)
-	}
-	defer func() {
-		for i := range dirs {
-			os.RemoveAll(dirs[i])
-		}
-	}()
+	dirs := setupBackupTest(t, numberOfFiles, numberOfDuplicates)
 	// One of the files now needs to be copied into both the source directory (under a new name)
 	// and that copy under the same new name
 	files, err := os.ReadDir(dirs[0])
@@ -400,8 +481,7 @@ func TestBackupSrcHasDuplicateFiles(t *testing.T) {
 	}
 	numberOfDuplicates += 1 // We have just created a duplicate
 	t.Log("Created Test Directories:", dirs)
-	_ = recalcTestDirectory(dirs[0])
-	_ = recalcTestDirectory(dirs[1])
+	_ = recalcTestDirectories(dirs[0], dirs[1])
 	var srcTm backupDupeMap
 	var dstTm backupDupeMap
 
@@ -430,14 +510,11 @@ func TestBackupSrcHasDuplicateFiles(t *testing.T) {
 	for err := range NewDirTracker(destDir, makerFuncDest) {
 		t.Error("Error received on closing:", err)
 	}
-	var lk sync.Mutex
-	expectedDuplicates := numberOfDuplicates
+	expectedDuplicates := int32(numberOfDuplicates)
 	bs := backScanner{
 		lookupFunc: func(path Fpath, ok bool) error {
 			if ok {
-				lk.Lock()
-				expectedDuplicates--
-				lk.Unlock()
+				atomic.AddInt32(&expectedDuplicates, -1)
 				t.Log(path, "is a duplicate")
 			}
 			return nil
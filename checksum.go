@@ -98,7 +98,17 @@ func appendXML(directory string, fsA []FileStruct) {
 // ReturnChecksumString gets the hash into the format we like it
 // This allows an external tool to calculate the sum
 func ReturnChecksumString(h hash.Hash) string {
-	return base64.StdEncoding.WithPadding(base64.NoPadding).EncodeToString([]byte(h.Sum(nil)))
+	var sum [md5.Size]byte
+	return base64.RawStdEncoding.EncodeToString(h.Sum(sum[:0]))
+}
+
+// md5BufPool holds the read buffers for CalcMd5File
+// Large reads keep the syscall count down on big media files
+var md5BufPool = sync.Pool{
+	New: func() interface{} {
+		buf := make([]byte, 1<<20)
+		return &buf
+	},
 }
 
 // CalcMd5File calculates the checksum for a specified filename
@@ -110,7 +120,10 @@ func CalcMd5File(directory, fn string) (string, error) {
 	}
 	defer func() { _ = f.Close() }()
 	h := md5.New()
-	if _, err := io.Copy(h, f); err != nil {
+	buf := md5BufPool.Get().(*[]byte)
+	defer md5BufPool.Put(buf)
+	// Hide any WriterTo on the file, so CopyBuffer really uses our buffer
+	if _, err := io.CopyBuffer(h, struct{ io.Reader }{f}, *buf); err != nil {
 		return "", err
 	}
 	return ReturnChecksumString(h), nil
@@ -169,10 +182,22 @@ func (cb *CalcBuffer) Close() {
 	cb.wg.Add(1)
 	cb.wg.Done()
 	cb.wg.Wait()
+	// Persist a few directories at once. Each encodes and writes its file
+	// while holding a token in md5FileReplace, so run no more than there are
+	// tokens rather than building every Md5File up front only to wait
+	tokenChan := makeTokenChan(cap(md5WriteTokenChan))
+	var wg sync.WaitGroup
 	for dir, dm := range cb.buff {
-		// FIXME
-		_ = dm.Persist(dir)
+		wg.Add(1)
+		<-tokenChan
+		go func(dir string, dm *DirectoryMap) {
+			defer wg.Done()
+			// FIXME
+			_ = dm.Persist(dir)
+			tokenChan <- struct{}{}
+		}(dir, dm)
 	}
+	wg.Wait()
 }
 func md5Calc(trigger chan struct{}, wg *sync.WaitGroup, fp string) (iw io.Writer) {
 	h := md5.New()
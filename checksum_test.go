@@ -41,22 +41,36 @@ func TestB2B(t *testing.T) {
 		log.Fatal("um error", err)
 	}
 }
+
+// testFileSize is the size of each random file the tests create
+const testFileSize = 75000
+
 func makeFile(directory string) string {
+	return makeFiles(directory, 1)[0]
+}
+
+// makeFiles creates cnt random files in directory
+// reading the random data for all of them in one go
+func makeFiles(directory string, cnt int) []string {
 	// FIXME it would be quicker to calculate the checksum here
 	// while it's an in memory object
-	buff := make([]byte, 75000)
+	buff := make([]byte, cnt*testFileSize)
 	rand.Read(buff)
-	tmpfile, err := ioutil.TempFile(directory, "example")
-	if err != nil {
-		log.Fatal(err)
-	}
-	if _, err := tmpfile.Write(buff); err != nil {
-		log.Fatal(err)
-	}
-	if err := tmpfile.Close(); err != nil {
-		log.Fatal(err)
-	}
-	return tmpfile.Name()
+	filenames := make([]string, cnt)
+	for i := range filenames {
+		tmpfile, err := ioutil.TempFile(directory, "example")
+		if err != nil {
+			log.Fatal(err)
+		}
+		if _, err := tmpfile.Write(buff[i*testFileSize : (i+1)*testFileSize]); err != nil {
+			log.Fatal(err)
+		}
+		if err := tmpfile.Close(); err != nil {
+			log.Fatal(err)
+		}
+		filenames[i] = tmpfile.Name()
+	}
+	return filenames
 }
 func TestMd5(t *testing.T) {
 	// Check the MD5 creation mechanism
@@ -86,7 +100,7 @@ func TestMd5(t *testing.T) {
 }
 func TestSelfCompat(t *testing.T) {
 	fileToUse := "checksum_test.go"
-	_ = md5FileWrite(".", nil)
+	_ = md5FileRemove(".")
 
 	dm := *NewDirectoryMap()
 	toMd5Chan, toUpdateXML, closedChan := NewChannels()
@@ -1,15 +1,16 @@
 package medorg
 
 import (
+	"bytes"
 	"encoding/xml"
 	"errors"
 	"fmt"
 	"io"
 	"io/fs"
-	"io/ioutil"
 	"log"
 	"os"
 	"path/filepath"
+	"sort"
 	"sync"
 )
 
@@ -54,11 +55,13 @@ func (dm DirectoryMap) Len() int {
 // ToMd5File returns the dm as an md5 file
 // i.e. why the hell are we not just using that?
 func (dm DirectoryMap) ToMd5File(dir string) (*Md5File, error) {
-	m5f := Md5File{
-		Dir: dir,
-	}
 	dm.lock.RLock()
 	defer dm.lock.RUnlock()
+	// Size Files up front rather than growing it a file at a time
+	m5f := Md5File{
+		Dir:   dir,
+		Files: make(FileStructArray, 0, len(dm.mp)),
+	}
 
 	for key, value := range dm.mp {
 		if key == value.Name {
@@ -67,6 +70,8 @@ func (dm DirectoryMap) ToMd5File(dir string) (*Md5File, error) {
 			return nil, ErrKey
 		}
 	}
+	// Map order is random, keep the output stable
+	sort.Sort(m5f.Files)
 	return &m5f, nil
 }
 
@@ -81,13 +86,19 @@ func (dm DirectoryMap) ToXML(dir string) (output []byte, err error) {
 
 // FromXML
 func (dm *DirectoryMap) FromXML(input []byte) (dir string, err error) {
+	return dm.fromReader(bytes.NewReader(input))
+}
+
+// fromReader decodes the xml as it is read, rather than buffering it all first
+func (dm *DirectoryMap) fromReader(r io.Reader) (dir string, err error) {
 	var m5f Md5File
 	// err = supressXmlUnmarshallErrors(input, &m5f)
-	err = xml.Unmarshal(input, &m5f)
+	err = xml.NewDecoder(r).Decode(&m5f)
 	if err != nil {
 		return "", err
 	}
 	for _, val := range m5f.Files {
+		internLabels(val.ArchivedAt)
 		dm.Add(val)
 	}
 	return m5f.Dir, nil
@@ -138,32 +149,24 @@ func DirectoryMapFromDir(directory string) (dm DirectoryMap, err error) {
 		return dm, errors.New("initialize malfunction")
 	}
 	fn := filepath.Join(directory, Md5FileName)
-	var f *os.File
-	_, err = os.Stat(fn)
-
+	f, err := os.Open(fn)
 	if errors.Is(err, os.ErrNotExist) {
 		// The MD5 file not existing is not an error,
 		// as long as there are no files in the directory,
 		// or it is the first time we've gone into it
 		return dm, nil
 	}
-	f, err = os.Open(fn)
-
 	if err != nil {
 		return dm, fmt.Errorf("%w error opening directory map file, %s/%s", err, directory, fn)
 	}
-	byteValue, err := ioutil.ReadAll(f)
-	if err != nil {
-		return
-	}
-	err = f.Close()
-	if err != nil {
-		return
-	}
-	_, err = dm.FromXML(byteValue)
+	_, err = dm.fromReader(f)
+	cerr := f.Close()
 	if err != nil {
 		return dm, fmt.Errorf("FromXML error \"%w\" on %s", err, directory)
 	}
+	if cerr != nil {
+		return dm, cerr
+	}
 
 	fc := func(fn string, fs FileStruct) (FileStruct, error) {
 		fs.directory = directory
@@ -288,14 +291,49 @@ func (dm DirectoryMap) UpdateChecksum(directory, file string, forceUpdate bool)
 	return dm.RunFsFc(directory, file, fc)
 }
 
+// presentNames returns the names found in directory
+// One ReadDir is much cheaper than a Stat for every entry we hold
+// A directory that has gone simply has nothing in it
+func presentNames(directory string) (map[string]struct{}, error) {
+	entries, err := os.ReadDir(directory)
+	if errors.Is(err, os.ErrNotExist) {
+		return map[string]struct{}{}, nil
+	}
+	if err != nil {
+		return nil, err
+	}
+	names := make(map[string]struct{}, len(entries))
+	for _, e := range entries {
+		names[e.Name()] = struct{}{}
+	}
+	return names, nil
+}
+
 // DeleteMissingFiles Delete any file entries that are in the dm,
 // but not on the disk
-// FIXME write a test for this
 func (dm DirectoryMap) DeleteMissingFiles() error {
+	// DirectoryMapFromDir gives every entry the same directory
+	// so read that once, rather than a Stat per entry
+	var directory string
+	var names map[string]struct{}
 	fc := func(fileName string, fs FileStruct) (FileStruct, error) {
-		fp := filepath.Join(fs.directory, fileName)
-		_, err := os.Stat(fp)
-		if errors.Is(err, os.ErrNotExist) {
+		if names == nil {
+			directory = fs.directory
+			var err error
+			names, err = presentNames(filepath.Join(directory, "."))
+			if err != nil {
+				return fs, err
+			}
+		}
+		if fs.directory != directory {
+			// Not from DirectoryMapFromDir, so check it directly
+			_, err := os.Stat(filepath.Join(fs.directory, fileName))
+			if errors.Is(err, os.ErrNotExist) {
+				return fs, errDeleteThisEntry
+			}
+			return fs, errIgnoreThisMutate
+		}
+		if _, ok := names[fileName]; !ok {
 			return fs, errDeleteThisEntry
 		}
 		return fs, errIgnoreThisMutate
@@ -317,7 +355,7 @@ func (dm DirectoryMap) Persist(directory string) error {
 		}
 		*dm.stale = false
 		if len(dm.mp) == 0 {
-			return true, md5FileWrite(directory, nil)
+			return true, md5FileRemove(directory)
 		}
 		return false, nil
 	}
@@ -326,14 +364,11 @@ func (dm DirectoryMap) Persist(directory string) error {
 		return err
 	}
 	// Write out a new Xml from the structure
-	ba, err := dm.ToXML(directory)
-	switch err {
-	case nil:
-	case io.EOF:
-	default:
-		return fmt.Errorf("unknown Error Marshalling Xml:%w", err)
-	}
-	return md5FileWrite(directory, ba)
+	m5f, err := dm.ToMd5File(directory)
+	if err != nil {
+		return err
+	}
+	return md5FileEncode(directory, m5f)
 }
 
 // Visitor satisfies DirectoryEntryInterface
@@ -381,6 +416,8 @@ func (dm0 DirectoryMap) Equal(dm DirectoryEntryInterface) bool {
 	if len(dm0.mp) != len(dm1.mp) {
 		return false
 	}
+	// Same length and every key of dm0 matched in dm1 means
+	// dm1 can have nothing extra, so there is no need to check back the other way
 	for k, v := range dm0.mp {
 		v1, ok := dm1.mp[k]
 		if !ok {
@@ -390,14 +427,5 @@ func (dm0 DirectoryMap) Equal(dm DirectoryEntryInterface) bool {
 			return false
 		}
 	}
-	for k, v := range dm1.mp {
-		v1, ok := dm0.mp[k]
-		if !ok {
-			return false
-		}
-		if !v.Equal(v1) {
-			return false
-		}
-	}
 	return true
 }
@@ -0,0 +1,97 @@
+package medorg
+
+import (
+	"io/ioutil"
+	"os"
+	"path/filepath"
+	"testing"
+)
+
+func TestDirectoryMapDeleteMissingFiles(t *testing.T) {
+	root, err := ioutil.TempDir("", "tstDir")
+	if err != nil {
+		t.Fatal(err)
+	}
+	defer os.RemoveAll(root)
+	files := makeFiles(root, 2)
+	subDir := filepath.Join(root, "sub")
+	err = os.Mkdir(subDir, 0755)
+	if err != nil {
+		t.Fatal(err)
+	}
+	makeFile(subDir)
+	err = recalcTestDirectory(root)
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	// A removed file goes, a present one stays
+	removed, kept := filepath.Base(files[0]), filepath.Base(files[1])
+	err = os.Remove(files[0])
+	if err != nil {
+		t.Fatal(err)
+	}
+	dm, err := DirectoryMapFromDir(root)
+	if err != nil {
+		t.Fatal(err)
+	}
+	err = dm.DeleteMissingFiles()
+	if err != nil {
+		t.Error(err)
+	}
+	if _, ok := dm.Get(removed); ok {
+		t.Error("Removed file still in map:", removed)
+	}
+	if _, ok := dm.Get(kept); !ok {
+		t.Error("Present file dropped from map:", kept)
+	}
+
+	// A removed directory empties the map
+	dm, err = DirectoryMapFromDir(subDir)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if dm.Len() != 1 {
+		t.Fatal("Expected one entry for", subDir, "got", dm.Len())
+	}
+	err = os.RemoveAll(subDir)
+	if err != nil {
+		t.Fatal(err)
+	}
+	err = dm.DeleteMissingFiles()
+	if err != nil {
+		t.Error(err)
+	}
+	if dm.Len() != 0 {
+		t.Error("Entries left for removed directory:", dm.Len())
+	}
+}
+
+func TestDirectoryMapIgnoresStaleTempFile(t *testing.T) {
+	root, err := ioutil.TempDir("", "tstDir")
+	if err != nil {
+		t.Fatal(err)
+	}
+	defer os.RemoveAll(root)
+	makeFiles(root, 2)
+	// As if a previous run died part way through a persist
+	stale, err := ioutil.TempFile(root, md5TempPrefix)
+	if err != nil {
+		t.Fatal(err)
+	}
+	stale.Close()
+	err = recalcTestDirectory(root)
+	if err != nil {
+		t.Fatal(err)
+	}
+	dm, err := DirectoryMapFromDir(root)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if _, ok := dm.Get(filepath.Base(stale.Name())); ok {
+		t.Error("Stale md5 temp file was recorded as a media file")
+	}
+	if dm.Len() != 2 {
+		t.Error("Expected 2 records, got", dm.Len())
+	}
+}
@@ -6,6 +6,7 @@ import (
 	"io/fs"
 	"log"
 	"path/filepath"
+	"strings"
 	"sync"
 )
 
@@ -22,6 +23,7 @@ type DirTracker struct {
 	dm        map[string]DirectoryTrackerInterface
 	newEntry  func(dir string) (DirectoryTrackerInterface, error)
 	lastPath  string
+	lastAbs   string
 	tokenChan chan struct{}
 	wg        *sync.WaitGroup
 	errChan   chan error
@@ -101,7 +103,9 @@ func (dt *DirTracker) pathCloser(path string, closerFunc func(string)) {
 	// i.e. close /fred/bob if we have received /fred/steve
 	// but do not close /fred or /fred/bob when we receive /fred/bob/steve
 	// But also, not doing anything is fine!
-	defer func() { dt.lastPath = path }()
+	// Resolve path once here, and keep it to compare against next time
+	absPath, absErr := filepath.Abs(path)
+	defer func() { dt.lastPath, dt.lastAbs = path, absPath }()
 	if dt.lastPath == "" {
 		return
 	}
@@ -114,16 +118,22 @@ func (dt *DirTracker) pathCloser(path string, closerFunc func(string)) {
 		}
 	}
 	// FIXME make it possbile to select this/another/default to this
-	shouldClose := func(pt string) bool {
-		isChild, err := isChildPath(pt, dt.lastPath)
-		if err != nil {
+	shouldClose := func() bool {
+		if absErr != nil {
 			// FIXME
 			return false
 		}
-
-		return !isChild
+		if dt.lastAbs == "" {
+			lastAbs, err := filepath.Abs(dt.lastPath)
+			if err != nil {
+				// FIXME
+				return false
+			}
+			dt.lastAbs = lastAbs
+		}
+		return !isChildPath(absPath, dt.lastAbs)
 	}
-	if shouldClose(path) {
+	if shouldClose() {
 		closerFunc(dt.lastPath)
 		delete(dt.dm, dt.lastPath)
 	}
@@ -154,6 +164,10 @@ func (dt *DirTracker) directoryWalker(path string, d fs.DirEntry, err error) err
 		fmt.Println("Skipping:", dir)
 		return filepath.SkipDir
 	}
+	if strings.HasPrefix(file, md5TempPrefix) {
+		// Left over from an interrupted write, it is not a media file
+		return nil
+	}
 	if dir == "" {
 		dir = "."
 	} else {
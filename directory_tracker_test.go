@@ -103,7 +103,7 @@ func TestDirectoryTrackerAgainstMock(t *testing.T) {
 		testName := fmt.Sprintln("DirectoryTrackerMock", ts)
 
 		t.Run(testName, func(t *testing.T) {
-			root, err := createTestMoveDetectDirectories(ts[0], ts[1], ts[2])
+			root, err := createTestEmptyDirectories(ts[0], ts[1], ts[2])
 			if err != nil {
 				t.Error("Error creating test directories", err)
 			}
@@ -172,7 +172,7 @@ func TestDirectoryTrackerSpawning(t *testing.T) {
 		}
 
 		t.Run(testName, func(t *testing.T) {
-			root, err := createTestMoveDetectDirectories(ts[0], ts[1], ts[2])
+			root, err := createTestEmptyDirectories(ts[0], ts[1], ts[2])
 			if err != nil {
 				t.Error("Error creating test directories", err)
 			}
@@ -2,6 +2,7 @@ package medorg
 
 import (
 	"bufio"
+	"encoding/xml"
 	"errors"
 	"fmt"
 	"io"
@@ -11,6 +12,7 @@ import (
 	"os/user"
 	"path/filepath"
 	"strings"
+	"sync"
 )
 
 // FIXME - this is rubbish
@@ -18,20 +20,70 @@ import (
 // We should be able to use that to pace limit this
 var md5WriteTokenChan = makeTokenChan(4)
 
-// md5FileWrite write to the directory's file
-// deletes the file, if the ba to write is empty
-func md5FileWrite(directory string, ba []byte) error {
+// md5FileRemove deletes the directory's file
+func md5FileRemove(directory string) error {
+	return md5FileReplace(directory, nil)
+}
+
+// md5FileEncode streams the xml into the directory's file
+// rather than marshalling it all in memory first
+func md5FileEncode(directory string, m5f *Md5File) error {
+	return md5FileReplace(directory, func(w io.Writer) error {
+		ew := &errWriter{w: w}
+		enc := xml.NewEncoder(ew)
+		enc.Indent("", "  ")
+		err := enc.Encode(m5f)
+		if err != nil && ew.err == nil {
+			return fmt.Errorf("unknown Error Marshalling Xml:%w", err)
+		}
+		return err
+	})
+}
+
+// md5TempPrefix starts the name of an md5 file still being written
+// After an interruption one can be left behind, so the walker skips them
+const md5TempPrefix = Md5FileName + ".tmp"
+
+// md5FileReplace replaces the directory's file with whatever wr writes
+// That goes to a temporary file first, so a failed write leaves the old file alone
+// A nil wr just deletes the file
+func md5FileReplace(directory string, wr func(io.Writer) error) error {
 	<-md5WriteTokenChan
 	defer func() { md5WriteTokenChan <- struct{}{} }()
 
 	fn := filepath.Join(directory, Md5FileName)
-	if _, err := os.Stat(fn); !errors.Is(err, os.ErrNotExist) {
+	if wr == nil {
 		_ = os.Remove(fn)
-	}
-	if ba == nil || (len(ba) == 0) {
 		return nil
 	}
-	return ioutil.WriteFile(fn, ba, 0600)
+	f, err := ioutil.TempFile(directory, md5TempPrefix)
+	if err != nil {
+		return err
+	}
+	err = wr(f)
+	if closeErr := f.Close(); err == nil {
+		err = closeErr
+	}
+	if err != nil {
+		_ = os.Remove(f.Name())
+		return err
+	}
+	return os.Rename(f.Name(), fn)
+}
+
+// errWriter remembers any error from the underlying writer
+// so it can be told apart from an encoding error
+type errWriter struct {
+	w   io.Writer
+	err error
+}
+
+func (ew *errWriter) Write(p []byte) (int, error) {
+	n, err := ew.w.Write(p)
+	if err != nil {
+		ew.err = err
+	}
+	return n, err
 }
 
 // FileExist tests if a file exists in a convenient fashion
@@ -80,13 +132,26 @@ func MvFile(srcDir, srcFn, dstDir, dstFn string) error {
 
 	return nil
 }
+
+// createdDirs remembers the directories createDestDirectoryAsNeeded has already
+// made sure of, as a backup copies many files into each destination directory
+var createdDirs sync.Map
+
 func createDestDirectoryAsNeeded(dst string) error {
 	dir := filepath.Dir(dst)
+	if _, ok := createdDirs.Load(dir); ok {
+		return nil
+	}
 	stat, err := os.Stat(dir)
 	if err == nil && stat.IsDir() {
+		createdDirs.Store(dir, struct{}{})
 		return nil
 	}
-	return os.MkdirAll(dir, 0777)
+	err = os.MkdirAll(dir, 0777)
+	if err == nil {
+		createdDirs.Store(dir, struct{}{})
+	}
+	return err
 }
 
 // CopyFile copies a file from src to dst. If src and dst files exist, and are
@@ -122,8 +187,23 @@ func CopyFile(src, dst Fpath) (err error) {
 	if err != nil {
 		return fmt.Errorf("issue in CopyFile creating directory tree %w", err)
 	}
-	if err = os.Link(srcs, dsts); err == nil {
-		return nil
+	err = linkOrCopy(srcs, dsts)
+	if errors.Is(err, os.ErrNotExist) {
+		// The directory may have gone since we cached it
+		// so forget it, recreate it and try once more
+		createdDirs.Delete(filepath.Dir(dsts))
+		err = createDestDirectoryAsNeeded(dsts)
+		if err != nil {
+			return fmt.Errorf("issue in CopyFile creating directory tree %w", err)
+		}
+		err = linkOrCopy(srcs, dsts)
+	}
+	return err
+}
+func linkOrCopy(srcs, dsts string) error {
+	err := os.Link(srcs, dsts)
+	if err == nil || errors.Is(err, os.ErrNotExist) {
+		return err
 	}
 	return copyFileContents(srcs, dsts)
 }
@@ -0,0 +1,40 @@
+package medorg
+
+import (
+	"io/ioutil"
+	"os"
+	"path/filepath"
+	"testing"
+)
+
+func TestCopyFileRecreatesRemovedDirectory(t *testing.T) {
+	srcDir, err := ioutil.TempDir("", "tstDir")
+	if err != nil {
+		t.Fatal(err)
+	}
+	defer os.RemoveAll(srcDir)
+	dstDir, err := ioutil.TempDir("", "tstDir")
+	if err != nil {
+		t.Fatal(err)
+	}
+	defer os.RemoveAll(dstDir)
+
+	src := Fpath(makeFile(srcDir))
+	subDir := filepath.Join(dstDir, "sub")
+	err = CopyFile(src, NewFpath(subDir, "a"))
+	if err != nil {
+		t.Fatal("First copy failed", err)
+	}
+	// Remove the directory behind CopyFile's back
+	err = os.RemoveAll(subDir)
+	if err != nil {
+		t.Fatal(err)
+	}
+	err = CopyFile(src, NewFpath(subDir, "a"))
+	if err != nil {
+		t.Error("Copy into a removed directory failed", err)
+	}
+	if !FileExist(subDir, "a") {
+		t.Error("Copy did not recreate", subDir)
+	}
+}
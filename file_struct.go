@@ -6,6 +6,7 @@ import (
 	"os"
 	"path/filepath"
 	"strings"
+	"sync"
 )
 
 // FileStruct contains all the properties associated with a file
@@ -65,8 +66,24 @@ func (fs FileStruct) Path() Fpath {
 }
 
 // Key to use when indexing into map for comparisons
-func (fs FileStruct) Key() backupKey {
-	return backupKey{fs.Size, fs.Checksum}
+func (fs FileStruct) Key() FileKey {
+	return FileKey{fs.Size, fs.Checksum}
+}
+
+// cloneForDest builds the record for a copy of this file in directory
+// Only the fields that survive a copy are carried across, and ArchivedAt
+// gets its own backing array so tagging the source does not alias it
+func (fs FileStruct) cloneForDest(directory string, mtime int64) FileStruct {
+	return FileStruct{
+		directory:  directory,
+		Name:       fs.Name,
+		Checksum:   fs.Checksum,
+		Mtime:      mtime,
+		Size:       fs.Size,
+		Analysed:   fs.Analysed,
+		Tags:       fs.Tags,
+		ArchivedAt: append([]string(nil), fs.ArchivedAt...),
+	}
 }
 
 // Equal test two file structs to see if we consider them equivalent
@@ -103,6 +120,31 @@ func (fs *FileStruct) FromStat(directory string, fn string, fsi os.FileInfo) (Fi
 	return *fs, nil
 }
 
+// labelIntern holds a single copy of each ArchivedAt label decoded
+// There are only ever a handful of volume labels, but every file repeats them
+var labelIntern = struct {
+	sync.RWMutex
+	mp map[string]string
+}{mp: make(map[string]string)}
+
+// internLabels swaps each label for the shared copy, in place
+func internLabels(labels []string) {
+	for i, l := range labels {
+		labelIntern.RLock()
+		v, ok := labelIntern.mp[l]
+		labelIntern.RUnlock()
+		if !ok {
+			labelIntern.Lock()
+			if v, ok = labelIntern.mp[l]; !ok {
+				labelIntern.mp[l] = l
+				v = l
+			}
+			labelIntern.Unlock()
+		}
+		labels[i] = v
+	}
+}
+
 func (fs FileStruct) indexTag(tag string) int {
 	for i, v := range fs.ArchivedAt {
 		if v == tag {
@@ -1,7 +1,6 @@
 package medorg
 
 import (
-	"os"
 	"path/filepath"
 	"strings"
 )
@@ -36,31 +35,19 @@ func (fpll *fpathListList) Add(index int, fp Fpath) {
 
 	(*fpll)[index].Add(fp)
 }
-func isChildPath(ref, candidate string) (bool, error) {
 
-	rp, err := filepath.Abs(ref)
-	if err != nil {
-		return false, err
-	}
-	can, err := filepath.Abs(candidate)
-	if err != nil {
-		return false, err
-	}
-
-	return strings.Contains(rp, can), nil
+// isChildPath reports if ref is within candidate
+// Both must already be absolute, see filepath.Abs
+func isChildPath(ref, candidate string) bool {
+	return strings.Contains(ref, candidate)
 }
 
+// isHiddenDirectory reports if any element of the directory path is hidden
+// The walker already knows path is a directory, so there's no need to stat it
 func isHiddenDirectory(path string) bool {
 	if path == "." || path == ".." {
 		return false
 	}
-	stat, err := os.Stat(path)
-	if err != nil {
-		return false
-	}
-	if !stat.IsDir() {
-		path, _ = filepath.Split(path)
-	}
 	path = filepath.Clean(path)
 	pa := strings.Split(path, string(filepath.Separator))
 
@@ -2,9 +2,11 @@ package medorg
 
 import (
 	"bufio"
+	"bytes"
 	"errors"
 	"fmt"
 	"io"
+	"sort"
 	"strings"
 )
 
@@ -109,8 +111,19 @@ func (jo Journal) Range(visitor func(DirectoryEntryJournalableInterface, string)
 var errShortWrite = errors.New("short write in journal")
 
 // ToWriter dumps the whole journal to a writer
+// Directories are written in sorted order so the output is deterministic
 func (jo Journal) ToWriter(fd io.Writer) error {
-	visitor := func(de DirectoryEntryJournalableInterface, dir string) error {
+	err := jo.selfCheck()
+	if err != nil {
+		return err
+	}
+	dirs := make([]string, 0, len(jo.location))
+	for dir := range jo.location {
+		dirs = append(dirs, dir)
+	}
+	sort.Strings(dirs)
+	for _, dir := range dirs {
+		de := jo.fl[jo.location[dir]]
 		xm, err := de.ToXML(dir)
 		if err != nil {
 			return err
@@ -122,9 +135,8 @@ func (jo Journal) ToWriter(fd io.Writer) error {
 		if n != len(xm) {
 			return fmt.Errorf("%w with %s", errShortWrite, de)
 		}
-		return nil
 	}
-	return jo.Range(visitor)
+	return nil
 }
 
 // scanToken returns a token which for us is an xml token
@@ -155,10 +167,10 @@ func getRecord(scanner *bufio.Scanner) (string, error) {
 	// myTxt should get a record at a time, i.e. <dr>....</dr>
 	var b strings.Builder
 	for scanner.Scan() {
-		txt := scanner.Text() // don't want to allocate twice
-		b.WriteString(txt)
+		txt := scanner.Bytes() // only the builder needs to allocate
+		b.Write(txt)
 		// search the minimum text possible
-		if strings.HasSuffix(txt, "</dr>") {
+		if bytes.HasSuffix(txt, []byte("</dr>")) {
 			return b.String(), nil
 		}
 	}
@@ -196,7 +208,8 @@ func (jo *Journal) FromReader(fd io.Reader) error {
 	}
 	fc := func(ip string) error {
 		de := NewDirectoryMap()
-		dir, err := de.FromXML([]byte(ip))
+		// Decode from the record itself, rather than copying it to a []byte first
+		dir, err := de.fromReader(strings.NewReader(ip))
 		if err != nil {
 			return err
 		}
@@ -371,3 +371,28 @@ func TestJournalXmlIo(t *testing.T) {
 		t.Error(err)
 	}
 }
+
+func TestJournalToWriterDeterministic(t *testing.T) {
+	initialDirectoryStructure := populateDirectoryStuff(2, 5)
+	initialDirectoryStructure.Dirs = []directoryTestStuff{
+		populateDirectoryStuff(1, 5),
+		populateDirectoryStuff(1, 5),
+		populateDirectoryStuff(1, 5),
+	}
+	journal := createInitialJournal(t, &initialDirectoryStructure)
+	var first bytes.Buffer
+	err := journal.ToWriter(&first)
+	if err != nil {
+		t.Fatal(err)
+	}
+	for i := 0; i < 10; i++ {
+		var b bytes.Buffer
+		err := journal.ToWriter(&b)
+		if err != nil {
+			t.Fatal(err)
+		}
+		if !bytes.Equal(first.Bytes(), b.Bytes()) {
+			t.Fatal("Journal output changed between writes")
+		}
+	}
+}
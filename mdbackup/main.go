@@ -78,8 +78,12 @@ func main() {
 	var scanflg = flag.Bool("scan", false, "Only scan files in src & dst updating labels, don't run the backup")
 	var dummyflg = flag.Bool("dummy", false, "Don't copy, just tell me what you'd do")
 	var delflg = flag.Bool("delete", false, "Delete duplicated Files")
+	var calcCnt = flag.Int("calc", medorg.BackupCalcCnt, "Max Number of MD5 calculators")
 
 	flag.Parse()
+	if *calcCnt > 0 {
+		medorg.BackupCalcCnt = *calcCnt
+	}
 	if flag.NArg() > 0 {
 		for _, fl := range flag.Args() {
 			_, err := os.Stat(fl)
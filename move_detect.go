@@ -3,7 +3,9 @@ package medorg
 import (
 	"errors"
 	"io/fs"
-	"os"
+	"path/filepath"
+	"sort"
+	"strings"
 	"sync"
 )
 
@@ -26,16 +28,6 @@ func (mvd *moveDetect) runMoveDetectFindDeleted(directory string) error {
 	visitFunc := func(dm DirectoryMap, dir, fn string, d fs.DirEntry) error {
 		return nil
 	}
-	fc := func(fn string, fileStruct FileStruct) (FileStruct, error) {
-		_, err := os.Stat(string(fileStruct.Path()))
-		if !errors.Is(err, os.ErrNotExist) {
-			return fileStruct, errIgnoreThisMutate
-		}
-		// The file does not exist on the disk, so
-		// add it to our list of files
-		mvd.add(fileStruct)
-		return fileStruct, errDeleteThisEntry
-	}
 	makerFunc := func(dir string) (DirectoryTrackerInterface, error) {
 		mkFk := func(dir string) (DirectoryEntryInterface, error) {
 			dm, err := DirectoryMapFromDir(dir)
@@ -43,6 +35,19 @@ func (mvd *moveDetect) runMoveDetectFindDeleted(directory string) error {
 			if err != nil {
 				return dm, err
 			}
+			names, err := presentNames(dir)
+			if err != nil {
+				return dm, err
+			}
+			fc := func(fn string, fileStruct FileStruct) (FileStruct, error) {
+				if _, ok := names[fn]; ok {
+					return fileStruct, errIgnoreThisMutate
+				}
+				// The file does not exist on the disk, so
+				// add it to our list of files
+				mvd.add(fileStruct)
+				return fileStruct, errDeleteThisEntry
+			}
 			return dm, dm.rangeMutate(fc)
 		}
 		return NewDirectoryEntry(dir, mkFk)
@@ -94,16 +99,63 @@ func (mvd *moveDetect) runMoveDetectFindNew(directory string) error {
 	return nil
 }
 
+// pruneNestedRoots drops any directory that is, or is inside, another one
+// Walking both would have two DirectoryMaps updating the same md5 file
+func pruneNestedRoots(dirs []string) ([]string, error) {
+	abs := make([]string, len(dirs))
+	for i, dir := range dirs {
+		var err error
+		abs[i], err = filepath.Abs(dir)
+		if err != nil {
+			return nil, err
+		}
+	}
+	sort.Strings(abs)
+	pruned := make([]string, 0, len(abs))
+	for _, dir := range abs {
+		if len(pruned) > 0 {
+			parent := pruned[len(pruned)-1]
+			if dir == parent || strings.HasPrefix(dir, strings.TrimSuffix(parent, string(filepath.Separator))+string(filepath.Separator)) {
+				continue
+			}
+		}
+		pruned = append(pruned, dir)
+	}
+	return pruned, nil
+}
+
 // RunMoveDetect the move detect on specified directories
 func RunMoveDetect(dirs []string) error {
-	var mvd moveDetect
-	for _, dir := range dirs {
-		// FIXME we should be able to run this in parallel
-		err := mvd.runMoveDetectFindDeleted(dir)
+	dirs, err := pruneNestedRoots(dirs)
+	if err != nil {
+		return err
+	}
+	// The trees are now independent, so look for the deleted files
+	// in all of them at once. Each collects its own, and they are
+	// merged in order so any (size, name) clash resolves the same way each run
+	found := make([]moveDetect, len(dirs))
+	errChan := make(chan error, len(dirs))
+	var wg sync.WaitGroup
+	for i, dir := range dirs {
+		wg.Add(1)
+		go func(i int, dir string) {
+			defer wg.Done()
+			errChan <- found[i].runMoveDetectFindDeleted(dir)
+		}(i, dir)
+	}
+	wg.Wait()
+	close(errChan)
+	for err := range errChan {
 		if err != nil {
 			return err
 		}
 	}
+	var mvd moveDetect
+	for i := range found {
+		for _, fileStruct := range found[i].dupeMap {
+			mvd.add(fileStruct)
+		}
+	}
 	for _, dir := range dirs {
 		err := mvd.runMoveDetectFindNew(dir)
 		if err != nil {
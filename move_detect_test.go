@@ -5,9 +5,11 @@ import (
 	"fmt"
 	"io/fs"
 	"io/ioutil"
+	"log"
 	"math/rand"
 	"os"
 	"path/filepath"
+	"sync"
 	"testing"
 )
 
@@ -24,20 +26,55 @@ func createTestDirectories(root string, cnt int) ([]string, error) {
 	return directoriesCreated, nil
 }
 func createTestFiles(directory string, numberOfFiles int) {
+	_ = makeFiles(directory, numberOfFiles)
+}
+
+// createEmptyTestFiles is for tests that only look at the names
+func createEmptyTestFiles(directory string, numberOfFiles int) {
 	for i := 0; i < numberOfFiles; i++ {
-		_ = makeFile(directory)
+		tmpfile, err := ioutil.TempFile(directory, "example")
+		if err != nil {
+			log.Fatal(err)
+		}
+		if err := tmpfile.Close(); err != nil {
+			log.Fatal(err)
+		}
 	}
 }
 func makeTestFilesAndDirectories(directory string, numberOfDirectoriesWide, numberOfDirectoriesDeep, numberOfFiles int) error {
+	return makeTestTree(directory, numberOfDirectoriesWide, numberOfDirectoriesDeep, numberOfFiles, createTestFiles)
+}
+func makeTestTree(directory string, numberOfDirectoriesWide, numberOfDirectoriesDeep, numberOfFiles int, fileMaker func(string, int)) error {
+	// The directory names come from a shared rand source
+	// so lay the tree out first, then fill it in parallel
+	var directories []string
+	err := makeTestDirectoryTree(directory, numberOfDirectoriesWide, numberOfDirectoriesDeep, &directories)
+	if err != nil {
+		return err
+	}
+	tokenChan := makeTokenChan(NumTrackerOutstanding)
+	var wg sync.WaitGroup
+	for _, v := range directories {
+		wg.Add(1)
+		<-tokenChan
+		go func(dir string) {
+			fileMaker(dir, numberOfFiles)
+			tokenChan <- struct{}{}
+			wg.Done()
+		}(v)
+	}
+	wg.Wait()
+	return nil
+}
+func makeTestDirectoryTree(directory string, numberOfDirectoriesWide, numberOfDirectoriesDeep int, directories *[]string) error {
 	directoriesCreated, err := createTestDirectories(directory, numberOfDirectoriesWide)
 	if err != nil {
 		return err
 	}
-
 	for _, v := range directoriesCreated {
-		createTestFiles(v, numberOfFiles)
+		*directories = append(*directories, v)
 		if numberOfDirectoriesDeep > 0 {
-			err := makeTestFilesAndDirectories(v, numberOfDirectoriesWide, numberOfDirectoriesDeep-1, numberOfFiles)
+			err := makeTestDirectoryTree(v, numberOfDirectoriesWide, numberOfDirectoriesDeep-1, directories)
 			if err != nil {
 				return err
 			}
@@ -53,6 +90,15 @@ func createTestMoveDetectDirectories(numberOfDirectoriesWide, numberOfDirectorie
 	return dir, makeTestFilesAndDirectories(dir, numberOfDirectoriesWide, numberOfDirectoriesDeep, numberOfFiles)
 }
 
+// createTestEmptyDirectories builds the same shape of tree with empty files
+func createTestEmptyDirectories(numberOfDirectoriesWide, numberOfDirectoriesDeep, numberOfFiles int) (string, error) {
+	dir, err := ioutil.TempDir("", "tstDir")
+	if err != nil {
+		return "", err
+	}
+	return dir, makeTestTree(dir, numberOfDirectoriesWide, numberOfDirectoriesDeep, numberOfFiles, createEmptyTestFiles)
+}
+
 // We want a function to select n random files and m random directories
 // The simplest way to do this would be to form a list of each
 // shuffle the list, and then select n & m from them
@@ -109,28 +155,23 @@ func checkTestDirectoryChecksums(dir string) error {
 }
 
 func moveNfiles(cnt int, files, directories []string) error {
+	// Resolve the directories once up front, rather than on every probe
+	absDirectories := make([]string, len(directories))
+	for i, dir := range directories {
+		absDirectories[i], _ = filepath.Abs(dir)
+	}
 	directoryPointer := 0
 	incrementDirectory := func() {
 		directoryPointer++
-		if directoryPointer > len(directories) {
+		if directoryPointer >= len(directories) {
 			directoryPointer = 0
 		}
 	}
-	seekCandidateDir := func(file string) bool {
-		selectedDirectory := directories[directoryPointer]
-
-		dir := filepath.Dir(file)
-		srcDir, _ := filepath.Abs(dir)
-		dstDir, _ := filepath.Abs(selectedDirectory)
-		if srcDir == dstDir {
-			incrementDirectory()
-			return true
-		}
-		return false
-	}
 	for i := 0; i < cnt; i++ {
 		selectedFile := files[i]
-		for seekCandidateDir(selectedFile) {
+		srcDir, _ := filepath.Abs(filepath.Dir(selectedFile))
+		for srcDir == absDirectories[directoryPointer] {
+			incrementDirectory()
 		}
 		selectedDirectory := directories[directoryPointer]
 		MoveFile(Fpath(selectedFile), NewFpath(selectedDirectory, filepath.Base(selectedFile)))
@@ -185,7 +226,6 @@ func TestMoveDetect(t *testing.T) {
 				t.Error("Error checking checksums for directories", err)
 			}
 			// t.Log("Created Test setup:", files, directories)
-			_ = recalcTestDirectory(root)
 			rand.Shuffle(len(files), func(i, j int) {
 				files[i], files[j] = files[j], files[i]
 			})
@@ -217,3 +257,85 @@ func TestMoveDetect(t *testing.T) {
 		})
 	}
 }
+
+func TestMoveDetectAcrossRoots(t *testing.T) {
+	var roots []string
+	for i := 0; i < 2; i++ {
+		root, err := ioutil.TempDir("", "tstDir")
+		if err != nil {
+			t.Fatal(err)
+		}
+		defer os.RemoveAll(root)
+		makeFiles(root, 3)
+		err = recalcTestDirectory(root)
+		if err != nil {
+			t.Fatal(err)
+		}
+		roots = append(roots, root)
+	}
+	// Move a file from the first root to the second
+	files, _ := gatherFilesAndDirectories(roots[0])
+	src := files[0]
+	dm, err := DirectoryMapFromDir(roots[0])
+	if err != nil {
+		t.Fatal(err)
+	}
+	before, ok := dm.Get(filepath.Base(src))
+	if !ok {
+		t.Fatal("No record for", src)
+	}
+	dst := filepath.Join(roots[1], filepath.Base(src))
+	err = os.Rename(src, dst)
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	err = RunMoveDetect(roots)
+	if err != nil {
+		t.Error("move detect problem", err)
+	}
+	for _, root := range roots {
+		err = checkTestDirectoryChecksums(root)
+		if err != nil {
+			t.Error("Error checking checksums for", root, err)
+		}
+	}
+	dm, err = DirectoryMapFromDir(roots[0])
+	if err != nil {
+		t.Fatal(err)
+	}
+	if _, ok := dm.Get(filepath.Base(src)); ok {
+		t.Error("Moved file still recorded in", roots[0])
+	}
+	dm, err = DirectoryMapFromDir(roots[1])
+	if err != nil {
+		t.Fatal(err)
+	}
+	after, ok := dm.Get(filepath.Base(dst))
+	if !ok {
+		t.Fatal("Moved file not recorded in", roots[1])
+	}
+	if after.Checksum != before.Checksum {
+		t.Error("Checksum not carried across the move")
+	}
+}
+
+func TestPruneNestedRoots(t *testing.T) {
+	sep := string(filepath.Separator)
+	root := sep + "media"
+	dirs := []string{
+		root + sep + "photos",
+		root,
+		root + sep + "photos" + sep + "2020",
+		root + "2",
+		root,
+	}
+	pruned, err := pruneNestedRoots(dirs)
+	if err != nil {
+		t.Fatal(err)
+	}
+	expected := []string{root, root + "2"}
+	if fmt.Sprint(pruned) != fmt.Sprint(expected) {
+		t.Error("Expected", expected, "got", pruned)
+	}
+}
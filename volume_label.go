@@ -30,10 +30,9 @@ type VolumeCfg struct {
 // NewVolumeCfg reads the config from an xml file
 func NewVolumeCfg(xc *XMLCfg, fn string) (*VolumeCfg, error) {
 	itm := new(VolumeCfg)
-	var f *os.File
-	_, err := os.Stat(fn)
 	itm.fn = fn
-
+	// Just try the read, a missing file tells us all a stat would
+	byteValue, err := ioutil.ReadFile(fn)
 	if os.IsNotExist(err) {
 		fmt.Println("Creating a new label")
 
@@ -42,16 +41,8 @@ func NewVolumeCfg(xc *XMLCfg, fn string) (*VolumeCfg, error) {
 			return nil, err
 		}
 	} else {
-		f, err = os.Open(fn)
-		if err != nil {
-			return nil, fmt.Errorf("error opening NewVolumeCfg file:%s::%w", fn, err)
-		}
-		defer f.Close()
-
-		byteValue, err := ioutil.ReadAll(f)
 		if err != nil {
 			return nil, fmt.Errorf("error loading NewVolumeCfg file:%s::%w", fn, err)
-
 		}
 		err = itm.FromXML(byteValue)
 		if err != nil {
@@ -159,15 +150,11 @@ func findVolumeConfig(dir string) string {
 		return !errors.Is(err, os.ErrNotExist)
 	}
 	getParent := func(dir string) string {
-		ds := strings.Split(dir, string(filepath.Separator))
-		if len(ds) > 1 {
-			result := filepath.Join(ds[0 : len(ds)-1]...)
-			if strings.HasPrefix(dir, "/") {
-				return filepath.Join("/", result)
-			}
-			return result
+		parent := filepath.Dir(dir)
+		if parent == dir || parent == "." {
+			return "/"
 		}
-		return "/"
+		return parent
 	}
 
 	d := strings.TrimPrefix(dir, filepath.VolumeName(dir))